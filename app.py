@@ -1,4 +1,6 @@
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
 import bibtexparser
 from bibtexparser.bwriter import BibTexWriter
@@ -87,26 +89,57 @@ if st.button("Fix BibTeX", type="primary"):
             else:
                 progress_bar = st.progress(0)
                 status_text = st.empty()
-                revised_entries = []
 
-                for i, entry in enumerate(db.entries):
-                    entry_id = entry.get("ID", f"entry_{i+1}")
-                    status_text.text(
-                        f"Processing entry {i+1}/{len(db.entries)}: {entry_id}"
-                    )
-
-                    single_entry_db = BibDatabase()
+                # Serialize every entry up front with one shared writer
+                # instead of rebuilding writer/database objects per entry.
+                writer = BibTexWriter()
+                writer.order_entries_by = None
+                single_entry_db = BibDatabase()
+                original_texts = []
+                for entry in db.entries:
                     single_entry_db.entries = [entry]
-                    writer = BibTexWriter()
-                    writer.order_entries_by = None
-                    original_entry_text = writer.write(single_entry_db)
-
-                    revised_entry_text = agent.revise_bibtex(
-                        original_entry_text, preferences
-                    )
-                    revised_entries.append(revised_entry_text)
-                    progress_bar.progress((i + 1) / len(db.entries))
-
+                    original_texts.append(writer.write(single_entry_db))
+
+                # Identical entries (duplicate keys/records) are revised once.
+                entry_hashes = [
+                    hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+                    for text in original_texts
+                ]
+                unique_indices = {}
+                unique_texts = []
+                unique_entries = []
+                for entry_hash, text, entry in zip(
+                    entry_hashes, original_texts, db.entries
+                ):
+                    if entry_hash not in unique_indices:
+                        unique_indices[entry_hash] = len(unique_texts)
+                        unique_texts.append(text)
+                        unique_entries.append(entry)
+
+                # API calls are I/O-bound, so a thread pool gives near-linear
+                # speedup; progress updates stay on the main thread.
+                revised_unique = [None] * len(unique_texts)
+                done = 0
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    futures = {
+                        executor.submit(
+                            agent.revise_bibtex, text, preferences, entry
+                        ): i
+                        for i, (text, entry) in enumerate(
+                            zip(unique_texts, unique_entries)
+                        )
+                    }
+                    for future in as_completed(futures):
+                        revised_unique[futures[future]] = future.result()
+                        done += 1
+                        status_text.text(
+                            f"Revised {done}/{len(unique_texts)} unique entries"
+                        )
+                        progress_bar.progress(done / len(unique_texts))
+
+                revised_entries = [
+                    revised_unique[unique_indices[h]] for h in entry_hashes
+                ]
                 status_text.text("Done!")
                 combined = "\n\n".join(revised_entries)
                 st.text_area("Revised BibTeX", combined, height=400)
@@ -1,16 +1,178 @@
+import asyncio
+import hashlib
 import os
 import sys
-from typing import Optional, Dict, Any
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
 import json
 import bibtexparser
+import diskcache
+import httpx
+import tiktoken
 from bibtexparser.bwriter import BibTexWriter
 from bibtexparser.bibdatabase import BibDatabase
-from openai import OpenAI
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    APIConnectionError,
+    APIStatusError,
+    RateLimitError,
+)
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 from importlib import resources
 
+BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+
+CACHE_DIR = Path.home() / ".cache" / "bibfixer"
+
+# Shared writer for normalization; BibTexWriter is stateless for our use.
+_writer = BibTexWriter()
+_writer.order_entries_by = None
+
+# Module-level client singletons so repeated BibFixAgent construction
+# (e.g. Streamlit reruns) reuses pooled TLS connections. The default httpx
+# pool of 10 connections would cap concurrent throughput well below rate
+# limits, so the pool is widened to match high fan-out.
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=100)
+_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+_clients: Dict[str, OpenAI] = {}
+_aclients: Dict[str, AsyncOpenAI] = {}
+
+
+def _get_client(api_key: str) -> OpenAI:
+    client = _clients.get(api_key)
+    if client is None:
+        client = OpenAI(
+            api_key=api_key,
+            base_url=BASE_URL,
+            http_client=httpx.Client(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT),
+        )
+        _clients[api_key] = client
+    return client
+
+
+def _get_async_client(api_key: str) -> AsyncOpenAI:
+    client = _aclients.get(api_key)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=BASE_URL,
+            http_client=httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT),
+        )
+        _aclients[api_key] = client
+    return client
+
+RETRYABLE_ERRORS = (RateLimitError, APIStatusError, APIConnectionError)
+
+# Fields an entry of each type must carry to be considered already complete;
+# complete entries can skip the LLM call entirely when no formatting
+# preferences are in play.
+REQUIRED_FIELDS = {
+    "article": ("author", "title", "journal", "year", "volume"),
+    "inproceedings": ("author", "title", "booktitle", "year"),
+    "incollection": ("author", "title", "booktitle", "publisher", "year"),
+    "book": ("author", "title", "publisher", "year"),
+    "phdthesis": ("author", "title", "school", "year"),
+    "mastersthesis": ("author", "title", "school", "year"),
+    "techreport": ("author", "title", "institution", "year"),
+}
+
+_backoff = wait_random_exponential(min=1, max=60)
+
+
+def _retry_wait(retry_state) -> float:
+    """Exponential backoff with jitter, honoring Retry-After when present."""
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    response = getattr(exc, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+    return _backoff(retry_state)
+
+
+def _retry_policy() -> dict:
+    return dict(
+        wait=_retry_wait,
+        stop=stop_after_attempt(6),
+        retry=retry_if_exception_type(RETRYABLE_ERRORS),
+        reraise=True,
+    )
+
+
+class RateLimiter:
+    """Dual token bucket capping requests/minute and tokens/minute.
+
+    Capacity is replenished continuously at rpm/60 and tpm/60 per elapsed
+    second; callers await ``acquire`` before each API request.
+    """
+
+    def __init__(self, max_rpm: Optional[int] = None, max_tpm: Optional[int] = None):
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
+        self._request_capacity = float(max_rpm) if max_rpm else 0.0
+        self._token_capacity = float(max_tpm) if max_tpm else 0.0
+        self._last_update = time.monotonic()
+        # Created lazily on first acquire: on Python 3.9 an asyncio.Lock
+        # binds the event loop at construction, and BibFixAgent is built
+        # before asyncio.run starts the loop.
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self, token_estimate: int) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self.max_tpm:
+            # A single prompt can exceed a small TPM cap; the bucket never
+            # holds more than max_tpm, so an uncapped estimate would make the
+            # wait below unsatisfiable and spin forever. Clamp it, which
+            # still forces a full-bucket wait for oversized prompts.
+            token_estimate = min(token_estimate, self.max_tpm)
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._last_update
+                self._last_update = now
+                if self.max_rpm:
+                    self._request_capacity = min(
+                        float(self.max_rpm),
+                        self._request_capacity + self.max_rpm * elapsed / 60.0,
+                    )
+                if self.max_tpm:
+                    self._token_capacity = min(
+                        float(self.max_tpm),
+                        self._token_capacity + self.max_tpm * elapsed / 60.0,
+                    )
+                request_ok = not self.max_rpm or self._request_capacity >= 1.0
+                token_ok = not self.max_tpm or self._token_capacity >= token_estimate
+                if request_ok and token_ok:
+                    if self.max_rpm:
+                        self._request_capacity -= 1.0
+                    if self.max_tpm:
+                        self._token_capacity -= token_estimate
+                    return
+            await asyncio.sleep(0.1)
+
 
 class BibFixAgent:
-    def __init__(self, api_key: Optional[str] = None, prompt_file: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        prompt_file: Optional[str] = None,
+        max_rpm: Optional[int] = None,
+        max_tpm: Optional[int] = None,
+        use_cache: bool = True,
+        skip_complete: bool = True,
+    ):
         self.api_key = api_key or os.getenv("DASHSCOPE_API_KEY")
         if not self.api_key:
             raise ValueError(
@@ -18,10 +180,114 @@ class BibFixAgent:
                 "Aliyun API key is required. Set Aliyun_API_KEY environment variable or pass it as argument."
             )
 
-        self.client = OpenAI(api_key=self.api_key, base_url="https://dashscope.aliyuncs.com/compatible-mode/v1")
+        self.client = _get_client(self.api_key)
+        self.aclient = _get_async_client(self.api_key)
         self.model = "qwen3-max"
         # self.model = "gpt-5-mini-2025-08-07"
         self.prompt_file_path = prompt_file
+        # Loaded once; prompts are built per entry and the file never changes.
+        self._instructions = self._load_instructions_from_file()
+        self.rate_limiter = (
+            RateLimiter(max_rpm=max_rpm, max_tpm=max_tpm)
+            if (max_rpm or max_tpm)
+            else None
+        )
+        self._encoding = None
+        self.cache = diskcache.Cache(str(CACHE_DIR)) if use_cache else None
+        self.skip_complete = skip_complete
+
+    def _is_complete(self, entry: Dict[str, Any]) -> bool:
+        """True if the entry already carries every required field for its type."""
+        required = REQUIRED_FIELDS.get(entry.get("ENTRYTYPE", "").lower())
+        if not required:
+            return False
+        return all(entry.get(field, "").strip() for field in required)
+
+    def _normalize_entry_text(
+        self, bibtex_string: str, entry: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Re-emit the entry via BibTexWriter so trivial reformatting of the
+        input doesn't miss the cache."""
+        try:
+            db = BibDatabase()
+            if entry is not None:
+                db.entries = [entry]
+            else:
+                db.entries = bibtexparser.loads(bibtex_string).entries
+            if db.entries:
+                return _writer.write(db).strip()
+        except Exception:
+            pass
+        return bibtex_string.strip()
+
+    def _cache_key(
+        self,
+        bibtex_string: str,
+        preferences: str,
+        entry: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        normalized = self._normalize_entry_text(bibtex_string, entry)
+        return hashlib.blake2b(
+            f"{self.model}\0{preferences}\0{normalized}".encode("utf-8")
+        ).hexdigest()
+
+    def _resolve_locally(self, bibtex_string: str, user_preferences: str) -> Optional[str]:
+        """Resolve an entry without an API call when possible.
+
+        Returns the cached revision or, for already-complete entries with no
+        preferences in play, the re-emitted original; None means the entry
+        still needs the API. Used to pre-filter batched dispatch so cache
+        hits and complete entries aren't packed into the prompt.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self._cache_key(bibtex_string, user_preferences))
+            if cached is not None:
+                return cached
+        if self.skip_complete and not user_preferences:
+            try:
+                parsed = self.parse_bibtex(bibtex_string)
+            except ValueError:
+                return None
+            if self._is_complete(parsed["original_entry"]):
+                return self._normalize_entry_text(bibtex_string)
+        return None
+
+    def _max_output_tokens(self, bibtex_string: str) -> int:
+        """A revised entry is roughly bounded by its input size; capping
+        output tokens keeps the model from appending prose and cuts
+        generation-bound tail latency."""
+        return min(1024, 2 * self._count_tokens(bibtex_string) + 256)
+
+    def _needs_web_search(self, entry: Dict[str, Any]) -> bool:
+        """Web search adds latency and cost; skip it for entries that already
+        carry a resolvable identifier (DOI, arXiv eprint, or URL)."""
+        if entry.get("doi", "").strip():
+            return False
+        if (
+            entry.get("eprint", "").strip()
+            and entry.get("archiveprefix", "").strip().lower() == "arxiv"
+        ):
+            return False
+        if entry.get("url", "").strip():
+            return False
+        return True
+
+    def _count_tokens(self, text: str) -> int:
+        if self._encoding is None:
+            try:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    # qwen models are not in tiktoken's registry; cl100k_base
+                    # is a close enough estimate for throttling purposes.
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # tiktoken downloads its BPE ranks on first use; without
+                # network access fall back to a character-based estimate.
+                self._encoding = False
+        if not self._encoding:
+            return max(1, len(text) // 4)
+        return len(self._encoding.encode(text))
 
     def _load_instructions_from_file(self) -> Optional[str]:
         if self.prompt_file_path:
@@ -40,58 +306,378 @@ class BibFixAgent:
             return None
 
     def parse_bibtex(self, bibtex_string: str) -> Dict[str, Any]:
+        """Parse the first entry out of a BibTeX string.
+
+        Callers that already hold a parsed entry dict should pass it to
+        :meth:`revise_bibtex` directly to skip this re-parse.
+        """
         try:
             bib_database = bibtexparser.loads(bibtex_string)
             if not bib_database.entries:
                 raise ValueError("No valid BibTeX entries found")
-            entry = bib_database.entries[0]
-            title = entry.get("title", "").strip("{}")
-            authors_str = entry.get("author", "")
-            if authors_str:
-                if " and " in authors_str:
-                    first_author = authors_str.split(" and ")[0].strip()
-                elif "," in authors_str:
-                    first_author = authors_str.split(",")[0].strip()
-                else:
-                    first_author = authors_str.strip()
-            else:
-                first_author = ""
-            return {
-                "original_entry": entry,
-                "title": title,
-                "first_author": first_author,
-                "entry_type": entry.get("ENTRYTYPE", "article"),
-            }
+            return self._describe_entry(bib_database.entries[0])
         except Exception as e:
             raise ValueError(f"Failed to parse BibTeX: {str(e)}")
 
-    def revise_bibtex(self, bibtex_string: str, user_preferences: str = "") -> str:
-        parsed = self.parse_bibtex(bibtex_string)
+    def _describe_entry(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        title = entry.get("title", "").strip("{}")
+        authors_str = entry.get("author", "")
+        if authors_str:
+            if " and " in authors_str:
+                first_author = authors_str.split(" and ")[0].strip()
+            elif "," in authors_str:
+                first_author = authors_str.split(",")[0].strip()
+            else:
+                first_author = authors_str.strip()
+        else:
+            first_author = ""
+        return {
+            "original_entry": entry,
+            "title": title,
+            "first_author": first_author,
+            "entry_type": entry.get("ENTRYTYPE", "article"),
+        }
+
+    def _build_messages(self, prompt: str, system_content: Optional[str] = None) -> list:
+        return [
+            {
+                "role": "system",
+                "content": system_content
+                or "You are a precise academic assistant that corrects and completes BibTeX entries. Always return valid BibTeX format.",
+            },
+            {"role": "user", "content": prompt},
+        ]
+
+    def _check_response(self, revised_bibtex: Optional[str]) -> str:
+        if not revised_bibtex:
+            raise ValueError("Could not extract BibTeX from response")
+        try:
+            bibtexparser.loads(revised_bibtex)
+        except Exception:
+            print(
+                "Warning: Response may not be valid BibTeX format", file=sys.stderr
+            )
+        return revised_bibtex
+
+    def revise_bibtex(
+        self,
+        bibtex_string: str,
+        user_preferences: str = "",
+        entry: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(bibtex_string, user_preferences, entry)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        parsed = (
+            self._describe_entry(entry)
+            if entry is not None
+            else self.parse_bibtex(bibtex_string)
+        )
+        if (
+            self.skip_complete
+            and not user_preferences
+            and self._is_complete(parsed["original_entry"])
+        ):
+            return self._normalize_entry_text(bibtex_string, entry)
+        prompt = self._create_prompt(bibtex_string, parsed, user_preferences)
+        enable_search = self._needs_web_search(parsed["original_entry"])
+        try:
+            for attempt in Retrying(**_retry_policy()):
+                with attempt:
+                    stream = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=self._build_messages(prompt),
+                        stream=True,
+                        max_tokens=self._max_output_tokens(bibtex_string),
+                        extra_body={"enable_search": enable_search}
+                    )
+                    chunks = []
+                    for event in stream:
+                        if event.choices and event.choices[0].delta.content:
+                            chunks.append(event.choices[0].delta.content)
+            revised = self._check_response("".join(chunks))
+            if cache_key is not None:
+                self.cache.set(cache_key, revised)
+            return revised
+        except Exception as e:
+            raise RuntimeError(f"Failed to call OpenAI API: {str(e)}")
+
+    async def revise_bibtex_async(
+        self,
+        bibtex_string: str,
+        user_preferences: str = "",
+        entry: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(bibtex_string, user_preferences, entry)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        parsed = (
+            self._describe_entry(entry)
+            if entry is not None
+            else self.parse_bibtex(bibtex_string)
+        )
+        if (
+            self.skip_complete
+            and not user_preferences
+            and self._is_complete(parsed["original_entry"])
+        ):
+            return self._normalize_entry_text(bibtex_string, entry)
         prompt = self._create_prompt(bibtex_string, parsed, user_preferences)
+        enable_search = self._needs_web_search(parsed["original_entry"])
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            async for attempt in AsyncRetrying(**_retry_policy()):
+                with attempt:
+                    if self.rate_limiter:
+                        await self.rate_limiter.acquire(self._count_tokens(prompt))
+                    stream = await self.aclient.chat.completions.create(
+                        model=self.model,
+                        messages=self._build_messages(prompt),
+                        stream=True,
+                        max_tokens=self._max_output_tokens(bibtex_string),
+                        extra_body={"enable_search": enable_search}
+                    )
+                    chunks = []
+                    async for event in stream:
+                        if event.choices and event.choices[0].delta.content:
+                            chunks.append(event.choices[0].delta.content)
+            revised = self._check_response("".join(chunks))
+            if cache_key is not None:
+                self.cache.set(cache_key, revised)
+            return revised
+        except Exception as e:
+            raise RuntimeError(f"Failed to call OpenAI API: {str(e)}")
+
+    def submit_batch(
+        self,
+        bibtex_strings: List[str],
+        user_preferences: str = "",
+        poll_interval: float = 30.0,
+    ) -> List[Optional[str]]:
+        """Revise entries through the Batch API, polling until completion.
+
+        Batch jobs run at half price with separate rate limits but may take
+        up to 24 hours, so this path suits large, latency-insensitive runs.
+        Returns one revised string per input entry; positions the job
+        produced no usable output for are None. Entries resolvable locally
+        (cache hits, already-complete records) are not submitted at all.
+        """
+        results: List[Optional[str]] = [
+            self._resolve_locally(text, user_preferences) for text in bibtex_strings
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        lines = []
+        for i in pending:
+            text = bibtex_strings[i]
+            parsed = self.parse_bibtex(text)
+            prompt = self._create_prompt(text, parsed, user_preferences)
+            lines.append(
+                json.dumps(
                     {
-                        "role": "system",
-                        "content": "You are a precise academic assistant that corrects and completes BibTeX entries. Always return valid BibTeX format.",
+                        "custom_id": f"entry-{i}",
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": self.model,
+                            "messages": self._build_messages(prompt),
+                            "max_tokens": self._max_output_tokens(text),
+                            "enable_search": self._needs_web_search(
+                                parsed["original_entry"]
+                            ),
+                        },
                     },
-                    {"role": "user", "content": prompt},
-                ],
-                extra_body={"enable_search": True}
-            )
-            revised_bibtex = response.choices[0].message.content
-            if not revised_bibtex:
-                raise ValueError("Could not extract BibTeX from response")
-            try:
-                bibtexparser.loads(revised_bibtex)
-            except Exception:
-                print(
-                    "Warning: Response may not be valid BibTeX format", file=sys.stderr
+                    ensure_ascii=False,
                 )
-            return revised_bibtex
-        except Exception as e:
-            raise RuntimeError(f"Failed to call OpenAI API: {str(e)}")
+            )
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+        input_file = self.client.files.create(
+            file=("bibfixer_batch.jsonl", payload), purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(
+                f"Batch job {batch.id} finished with status '{batch.status}'"
+            )
+        by_custom_id: Dict[str, str] = {}
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            choices = ((record.get("response") or {}).get("body") or {}).get(
+                "choices"
+            ) or []
+            if choices:
+                content = (choices[0].get("message") or {}).get("content")
+                if content:
+                    by_custom_id[record.get("custom_id", "")] = content
+        for i in pending:
+            content = by_custom_id.get(f"entry-{i}")
+            if content:
+                revised = self._check_response(content)
+                if self.cache is not None:
+                    self.cache.set(
+                        self._cache_key(bibtex_strings[i], user_preferences), revised
+                    )
+                results[i] = revised
+        return results
+
+    _BATCH_SYSTEM_MESSAGE = (
+        "You are a precise academic assistant that corrects and completes "
+        "BibTeX entries. Always return a single valid JSON object."
+    )
+
+    def _create_batch_prompt(self, bibtex_strings: List[str], preferences: str) -> str:
+        parts = [
+            "Please search the web for each of the following academic papers "
+            "and correct/complete their BibTeX entries:\n"
+        ]
+        for i, text in enumerate(bibtex_strings, start=1):
+            parts.append(f"=== ENTRY {i} ===\n```bibtex\n{text.strip()}\n```\n")
+        if self._instructions:
+            parts.append(self._instructions)
+        else:
+            print(
+                "Warning: prompt file not found or unreadable; proceeding without detailed instructions.",
+                file=sys.stderr,
+            )
+        if preferences:
+            parts.append(
+                f"Apply these user preferences to the formatting:\n{preferences}\n"
+            )
+        parts.append(
+            'Return ONLY a JSON object of the form {"entries": ["<revised entry 1>", '
+            '"<revised entry 2>", ...]} with one corrected BibTeX string per input '
+            "entry, in the same order. Do not include any explanation or additional text.\n"
+        )
+        return "\n".join(parts)
+
+    def _split_batch_response(self, content: Optional[str], expected: int) -> List[Optional[str]]:
+        """Extract per-entry strings from a batch JSON response.
+
+        Positions the model failed to return usable text for are None so the
+        caller can fall back to a per-entry call.
+        """
+        try:
+            parsed = json.loads(content) if content else None
+        except json.JSONDecodeError:
+            parsed = None
+        items = parsed.get("entries") if isinstance(parsed, dict) else None
+        if not isinstance(items, list):
+            items = []
+        result: List[Optional[str]] = []
+        for i in range(expected):
+            item = items[i] if i < len(items) else None
+            result.append(item if isinstance(item, str) and item.strip() else None)
+        return result
+
+    def revise_bibtex_batch(self, bibtex_strings: List[str], user_preferences: str = "") -> list:
+        """Revise several entries in a single API round-trip.
+
+        Positions whose per-entry fallback also fails hold the raised
+        exception instead of text, so one bad entry doesn't discard its
+        siblings' results.
+        """
+        if not bibtex_strings:
+            return []
+        revised: list = [
+            self._resolve_locally(text, user_preferences) for text in bibtex_strings
+        ]
+        pending = [i for i, result in enumerate(revised) if result is None]
+        if not pending:
+            return revised
+        pending_texts = [bibtex_strings[i] for i in pending]
+        prompt = self._create_batch_prompt(pending_texts, user_preferences)
+        try:
+            for attempt in Retrying(**_retry_policy()):
+                with attempt:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=self._build_messages(prompt, self._BATCH_SYSTEM_MESSAGE),
+                        response_format={"type": "json_object"},
+                        max_tokens=sum(
+                            self._max_output_tokens(t) for t in pending_texts
+                        ),
+                        extra_body={"enable_search": True}
+                    )
+            items = self._split_batch_response(
+                response.choices[0].message.content, len(pending_texts)
+            )
+        except Exception:
+            items = [None] * len(pending_texts)
+        for i, item in zip(pending, items):
+            original = bibtex_strings[i]
+            if item is None:
+                try:
+                    revised[i] = self.revise_bibtex(original, user_preferences)
+                except Exception as e:
+                    revised[i] = e
+            else:
+                text = self._check_response(item)
+                if self.cache is not None:
+                    self.cache.set(self._cache_key(original, user_preferences), text)
+                revised[i] = text
+        return revised
+
+    async def revise_bibtex_batch_async(self, bibtex_strings: List[str], user_preferences: str = "") -> list:
+        """Async variant of :meth:`revise_bibtex_batch`."""
+        if not bibtex_strings:
+            return []
+        revised: list = [
+            self._resolve_locally(text, user_preferences) for text in bibtex_strings
+        ]
+        pending = [i for i, result in enumerate(revised) if result is None]
+        if not pending:
+            return revised
+        pending_texts = [bibtex_strings[i] for i in pending]
+        prompt = self._create_batch_prompt(pending_texts, user_preferences)
+        try:
+            async for attempt in AsyncRetrying(**_retry_policy()):
+                with attempt:
+                    if self.rate_limiter:
+                        await self.rate_limiter.acquire(self._count_tokens(prompt))
+                    response = await self.aclient.chat.completions.create(
+                        model=self.model,
+                        messages=self._build_messages(prompt, self._BATCH_SYSTEM_MESSAGE),
+                        response_format={"type": "json_object"},
+                        max_tokens=sum(
+                            self._max_output_tokens(t) for t in pending_texts
+                        ),
+                        extra_body={"enable_search": True}
+                    )
+            items = self._split_batch_response(
+                response.choices[0].message.content, len(pending_texts)
+            )
+        except Exception:
+            items = [None] * len(pending_texts)
+        for i, item in zip(pending, items):
+            original = bibtex_strings[i]
+            if item is None:
+                try:
+                    revised[i] = await self.revise_bibtex_async(
+                        original, user_preferences
+                    )
+                except Exception as e:
+                    revised[i] = e
+            else:
+                text = self._check_response(item)
+                if self.cache is not None:
+                    self.cache.set(self._cache_key(original, user_preferences), text)
+                revised[i] = text
+        return revised
 
     def _create_prompt(
         self, original_bibtex: str, parsed: Dict[str, Any], preferences: str
@@ -108,9 +694,8 @@ Original BibTeX entry:
 {original_bibtex}
 ```
 """
-        external_instructions = self._load_instructions_from_file()
-        if external_instructions:
-            prompt += "\n" + external_instructions
+        if self._instructions:
+            prompt += "\n" + self._instructions
         else:
             print(
                 "Warning: prompt file not found or unreadable; proceeding without detailed instructions.",
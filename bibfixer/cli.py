@@ -1,11 +1,83 @@
+import asyncio
+import hashlib
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import argparse
 import bibtexparser
 from bibtexparser.bwriter import BibTexWriter
 from bibtexparser.bibdatabase import BibDatabase
+from tqdm import tqdm
 from .agent import BibFixAgent
 
+# One shared writer: BibTexWriter is stateless for our use, and building a
+# fresh instance per entry is measurable overhead on large .bib files.
+_writer = BibTexWriter()
+_writer.order_entries_by = None
+
+
+def _dump_single_entry(entry_dict: Dict[str, Any]) -> str:
+    single_db = BibDatabase()
+    single_db.entries = [entry_dict]
+    return _writer.write(single_db)
+
+
+async def _revise_all(
+    agent: BibFixAgent,
+    entry_texts: List[str],
+    preferences: str,
+    max_concurrency: int,
+    batch_size: int = 1,
+    entry_dicts: Optional[List[Dict[str, Any]]] = None,
+) -> list:
+    """Revise all entries concurrently, capping in-flight requests.
+
+    With batch_size > 1 entries are packed into multi-entry requests; the
+    flattened result list still has one item (text or exception) per entry.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    progress = tqdm(
+        total=len(entry_texts), desc="Revising", unit="entry", file=sys.stderr
+    )
+
+    async def _revise_one(text: str, entry: Optional[Dict[str, Any]]) -> str:
+        async with semaphore:
+            try:
+                return await agent.revise_bibtex_async(text, preferences, entry=entry)
+            finally:
+                progress.update(1)
+
+    async def _revise_chunk(chunk: List[str]) -> List[str]:
+        async with semaphore:
+            try:
+                return await agent.revise_bibtex_batch_async(chunk, preferences)
+            finally:
+                progress.update(len(chunk))
+
+    try:
+        if batch_size <= 1:
+            dicts = entry_dicts if entry_dicts is not None else [None] * len(entry_texts)
+            return await asyncio.gather(
+                *(_revise_one(text, entry) for text, entry in zip(entry_texts, dicts)),
+                return_exceptions=True,
+            )
+
+        chunks = [
+            entry_texts[i : i + batch_size]
+            for i in range(0, len(entry_texts), batch_size)
+        ]
+        chunk_results = await asyncio.gather(
+            *(_revise_chunk(chunk) for chunk in chunks), return_exceptions=True
+        )
+        results: list = []
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            if isinstance(chunk_result, Exception):
+                results.extend([chunk_result] * len(chunk))
+            else:
+                results.extend(chunk_result)
+        return results
+    finally:
+        progress.close()
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(
@@ -30,6 +102,46 @@ def main() -> None:
     parser.add_argument(
         "--api-key", help="OpenAI API key (or set OPENAI_API_KEY env var)"
     )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=8,
+        help="Maximum number of entries revised in parallel (default: 8)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Number of entries packed into each LLM request (default: 1; try 5-10 for large files)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit all entries as one Batch API job (half cost, up to 24h turnaround)",
+    )
+    parser.add_argument(
+        "--no-skip-complete",
+        action="store_true",
+        help="Always call the LLM, even for entries that already have all required fields",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the on-disk response cache (~/.cache/bibfixer)",
+    )
+    parser.add_argument(
+        "--max-rpm",
+        type=int,
+        default=None,
+        help="Cap API requests per minute (default: no cap)",
+    )
+    parser.add_argument(
+        "--max-tpm",
+        type=int,
+        default=None,
+        help="Cap estimated prompt tokens per minute (default: no cap; a single "
+        "prompt is ~1000 tokens, so caps below that act as one request/minute)",
+    )
 
     args = parser.parse_args()
 
@@ -48,7 +160,14 @@ def main() -> None:
         sys.exit(1)
 
     try:
-        agent = BibFixAgent(api_key=args.api_key, prompt_file=args.prompt_file)
+        agent = BibFixAgent(
+            api_key=args.api_key,
+            prompt_file=args.prompt_file,
+            max_rpm=args.max_rpm,
+            max_tpm=args.max_tpm,
+            use_cache=not args.no_cache,
+            skip_complete=not args.no_skip_complete,
+        )
     except ValueError as e:
         print(f"Error: {str(e)}", file=sys.stderr)
         sys.exit(1)
@@ -63,37 +182,77 @@ def main() -> None:
         print(f"Error parsing BibTeX: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
-    def _dump_single_entry(entry_dict: Dict[str, Any]) -> str:
-        single_db = BibDatabase()
-        single_db.entries = [entry_dict]
-        writer = BibTexWriter()
-        writer.order_entries_by = None
-        return writer.write(single_db)
-
-    revised_entries_text: list[str] = []
     print(
-        f"Found {len(entries)} entr{'y' if len(entries)==1 else 'ies'}; processing sequentially...",
+        f"Found {len(entries)} entr{'y' if len(entries)==1 else 'ies'}; "
+        f"processing up to {args.max_concurrency} concurrently...",
         file=sys.stderr,
     )
-    for idx, entry in enumerate(entries, start=1):
+    entry_texts = [_dump_single_entry(entry) for entry in entries]
+
+    # Deduplicate identical entries so each unique text is revised once.
+    entry_hashes = [
+        hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        for text in entry_texts
+    ]
+    unique_indices: Dict[bytes, int] = {}
+    unique_texts: list[str] = []
+    unique_entries: list[Dict[str, Any]] = []
+    for h, text, entry in zip(entry_hashes, entry_texts, entries):
+        if h not in unique_indices:
+            unique_indices[h] = len(unique_texts)
+            unique_texts.append(text)
+            unique_entries.append(entry)
+    if len(unique_texts) < len(entry_texts):
+        print(
+            f"Skipping {len(entry_texts) - len(unique_texts)} duplicate entr"
+            f"{'y' if len(entry_texts) - len(unique_texts) == 1 else 'ies'}...",
+            file=sys.stderr,
+        )
+
+    if args.batch:
+        print(
+            f"Submitting {len(unique_texts)} entries as a Batch API job; "
+            "this may take up to 24 hours...",
+            file=sys.stderr,
+        )
+        try:
+            unique_results = agent.submit_batch(unique_texts, args.preferences)
+        except Exception as e:
+            print(f"Error: batch job failed: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        unique_results = asyncio.run(
+            _revise_all(
+                agent,
+                unique_texts,
+                args.preferences,
+                args.max_concurrency,
+                batch_size=args.batch_size,
+                entry_dicts=unique_entries,
+            )
+        )
+    results = [unique_results[unique_indices[h]] for h in entry_hashes]
+
+    revised_entries_text: list[str] = []
+    for idx, (entry, original_entry_text, result) in enumerate(
+        zip(entries, entry_texts, results), start=1
+    ):
         key = entry.get("ID", f"entry_{idx}")
-        print(f"Revising {idx}/{len(entries)}: {key}", file=sys.stderr)
-        original_entry_text = _dump_single_entry(entry)
         separator = "=" * 80
         print(separator)
         print("--- BEFORE ---")
         print(original_entry_text.strip())
-        try:
-            revised_text = agent.revise_bibtex(original_entry_text, args.preferences)
-            revised_entries_text.append(revised_text.strip())
-            final_text = revised_text
-        except Exception as e:
+        if isinstance(result, Exception) or result is None:
+            reason = str(result) if isinstance(result, Exception) else "no result returned"
             print(
-                f"Error revising entry '{key}': {str(e)} — keeping original",
+                f"Error revising entry '{key}': {reason} — keeping original",
                 file=sys.stderr,
             )
             revised_entries_text.append(original_entry_text.strip())
             final_text = original_entry_text
+        else:
+            revised_entries_text.append(result.strip())
+            final_text = result
         print("--- AFTER ----")
         print(final_text.strip())
         print(separator)